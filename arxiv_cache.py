@@ -0,0 +1,183 @@
+"""
+Local arXiv metadata cache, harvested in bulk through the OAI-PMH interface.
+"""
+
+import json
+import sqlite3
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+from contextlib import closing
+from typing import Any, Dict, List, Optional
+
+OAI_ENDPOINT = "http://export.arxiv.org/oai2"
+
+NAMESPACES = {
+    "oai": "http://www.openarchives.org/OAI/2.0/",
+    "arXiv": "http://arxiv.org/OAI/arXiv/",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    arxiv_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    abstract TEXT NOT NULL,
+    authors_json TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    submitted TEXT NOT NULL,
+    categories TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS papers_year_submitted ON papers (year, submitted);
+CREATE TABLE IF NOT EXISTS harvest_state (
+    set_spec TEXT PRIMARY KEY,
+    last_datestamp TEXT NOT NULL
+);
+"""
+
+
+class BulkArxivCache:
+    """SQLite table of arXiv metadata that domain queries can run against locally"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call, since Streamlit serves reruns from several threads
+        return sqlite3.connect(self.db_path)
+
+    def search(self, domain: str, year_start: int, year_end: int, limit: int) -> List[Dict[str, Any]]:
+        """Return the most recent cached papers mentioning the domain, newest first"""
+        # '_' can reach here through the domain's \w, and LIKE would treat it as a wildcard
+        escaped = domain.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT arxiv_id, title, abstract, authors_json, year FROM papers "
+                "WHERE year BETWEEN ? AND ? AND (title LIKE ? ESCAPE '\\' OR abstract LIKE ? ESCAPE '\\') "
+                "ORDER BY submitted DESC LIMIT ?",
+                (year_start, year_end, pattern, pattern, limit)
+            ).fetchall()
+
+        # Same shape as the records PaperRetriever builds from the live API
+        return [
+            {
+                "title": title,
+                "authors": json.loads(authors_json),
+                "year": year,
+                "abstract": abstract,
+                "url": f"https://arxiv.org/abs/{arxiv_id}",
+                "citation_count": 0
+            }
+            for arxiv_id, title, abstract, authors_json, year in rows
+        ]
+
+    def harvest(self, set_spec: str = "cs", from_date: Optional[str] = None) -> int:
+        """Incrementally download ListRecords pages into the cache
+
+        Without from_date, harvesting resumes from the last datestamp of the
+        previous complete harvest of this set. Returns the number of records stored.
+        """
+        if from_date is None:
+            from_date = self._last_datestamp(set_spec)
+
+        params = {"verb": "ListRecords", "metadataPrefix": "arXiv", "set": set_spec}
+        if from_date:
+            params["from"] = from_date
+
+        stored = 0
+        latest = from_date or ""
+        while params:
+            root = ET.fromstring(self._fetch(params))
+
+            # Errors such as badResumptionToken arrive with HTTP 200 and look like an empty
+            # last page, so stop before harvest_state can move past the records never fetched
+            error = root.find("oai:error", NAMESPACES)
+            if error is not None and error.get("code") != "noRecordsMatch":
+                raise RuntimeError(
+                    f"arXiv OAI-PMH error {error.get('code')}: {(error.text or '').strip()}"
+                )
+
+            # noRecordsMatch is an empty, complete list and falls through as one
+            records = []
+            for record in root.iterfind(".//oai:record", NAMESPACES):
+                datestamp = record.findtext("oai:header/oai:datestamp", "", NAMESPACES)
+                latest = max(latest, datestamp)
+                metadata = record.find("oai:metadata/arXiv:arXiv", NAMESPACES)
+                if metadata is not None:
+                    records.append(self._parse_metadata(metadata, datestamp))
+
+            # Follow the resumption token until the list is complete
+            token = root.findtext(".//oai:resumptionToken", "", NAMESPACES).strip()
+            params = {"verb": "ListRecords", "resumptionToken": token} if token else None
+
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO papers VALUES (?, ?, ?, ?, ?, ?, ?)", records
+                )
+                # Pages are not in datestamp order, so only a complete list may move the
+                # incremental start date; an interrupted harvest is redone from the old one
+                if params is None and latest:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO harvest_state VALUES (?, ?)", (set_spec, latest)
+                    )
+            stored += len(records)
+
+        return stored
+
+    def _last_datestamp(self, set_spec: str) -> Optional[str]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT last_datestamp FROM harvest_state WHERE set_spec = ?", (set_spec,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _fetch(self, params: Dict[str, str]) -> bytes:
+        url = f"{OAI_ENDPOINT}?{urllib.parse.urlencode(params)}"
+        for _ in range(5):
+            try:
+                with urllib.request.urlopen(url, timeout=60) as response:
+                    return response.read()
+            except urllib.error.HTTPError as e:
+                # arXiv throttles harvesters with 503 and a Retry-After header
+                if e.code != 503:
+                    raise
+                time.sleep(int(e.headers.get("Retry-After", 10)))
+        raise RuntimeError("arXiv OAI-PMH endpoint kept asking to retry later")
+
+    @staticmethod
+    def _parse_metadata(metadata: ET.Element, datestamp: str) -> tuple:
+        def text(tag: str) -> str:
+            # Titles and abstracts are hard-wrapped in the OAI feed
+            return " ".join(metadata.findtext(f"arXiv:{tag}", "", NAMESPACES).split())
+
+        authors = [
+            " ".join(filter(None, (
+                author.findtext("arXiv:forenames", "", NAMESPACES),
+                author.findtext("arXiv:keyname", "", NAMESPACES),
+            )))
+            for author in metadata.iterfind("arXiv:authors/arXiv:author", NAMESPACES)
+        ]
+        submitted = text("created") or datestamp
+        return (
+            text("id"),
+            text("title"),
+            text("abstract"),
+            json.dumps(authors, ensure_ascii=False),
+            int(submitted[:4]),
+            submitted,
+            text("categories"),
+        )
+
+
+if __name__ == "__main__":
+    # Usage: python arxiv_cache.py <db_path> [set_spec] [from_date YYYY-MM-DD]
+    cache = BulkArxivCache(sys.argv[1])
+    set_spec = sys.argv[2] if len(sys.argv) > 2 else "cs"
+    from_date = sys.argv[3] if len(sys.argv) > 3 else None
+    print(f"Harvesting arXiv set '{set_spec}' into {cache.db_path}...")
+    print(f"Stored {cache.harvest(set_spec, from_date)} records.")
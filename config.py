@@ -2,10 +2,22 @@ import os
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
+from functools import lru_cache
 import re
 
+try:
+    import streamlit as st
+except ImportError:  # Allow the modules to be used outside of the Streamlit app
+    st = None
+
 load_dotenv()
 
+def cache_resource(func):
+    """Create the resource once per process, shared across Streamlit reruns"""
+    if st is None:
+        return lru_cache(maxsize=None)(func)
+    return st.cache_resource(func)
+
 class DomainInput(BaseModel):
     domain: str = Field(..., min_length=3, max_length=100, 
                        description="研究领域名称，如'量子计算'")
@@ -1,33 +1,68 @@
 
 import streamlit as st
+import threading
+import time
+from collections import OrderedDict
+from streamlit.runtime.scriptrunner import add_script_run_ctx
 from paper_retriever import PaperRetriever
-from review_generator import ReviewGenerator
+from review_generator import ReviewGenerator, warm_up_clients
 from config import DomainInput, Paper, ReviewOutput
-import json
-import re
-from typing import List
-from security import security_validator
+from typing import Sequence, Tuple
+from security import security_validator, ValidatedInput, DOMAIN_PATTERN, YEARS_PATTERN
 
 # --- Caching Functions ---
 # By using @st.cache_data, Streamlit will store the results of these functions.
 # If the function is called again with the same inputs, it will return the cached result
 # instead of re-running the code, saving time and API calls.
+# Entries expire after an hour and only the most recent ones are kept, so memory stays bounded.
+# Long-lived objects such as the LLM clients are shared via @st.cache_resource instead.
+# Reviews are cached separately below, because they are streamed to the page.
 
-@st.cache_data
-def get_papers(domain: str, years: str, count: int) -> List[Paper]:
+@st.cache_data(ttl=3600, max_entries=32)
+def get_papers(validated_input: ValidatedInput) -> Tuple[Paper, ...]:
     """Retrieves and caches papers from arXiv."""
     # This message will only appear when the cache is "missed" (i.e., the function is run).
     st.info("Cache miss: Retrieving fresh papers from source...")
     retriever = PaperRetriever()
-    return retriever.search_papers(domain, years, count)
+    return tuple(retriever.search_papers(validated_input))
 
-@st.cache_data
-def generate_review(_papers: List[Paper], domain: str, temperature: float, model: str) -> ReviewOutput:
-    """Generates and caches the review using the selected LLM."""
+# The review is streamed to the page on a cache miss. Streamlit records and replays every
+# element written inside @st.cache_data, so only the parsed review is cached, by hand,
+# with the same expiry and size limit as above.
+REVIEW_CACHE_TTL = 3600
+REVIEW_CACHE_MAX_ENTRIES = 32
+
+@st.cache_resource
+def _review_cache() -> Tuple[threading.Lock, "OrderedDict[tuple, Tuple[float, ReviewOutput]]"]:
+    """Parsed reviews shared across sessions, oldest first, with the time they were stored."""
+    return threading.Lock(), OrderedDict()
+
+def generate_review(papers: Sequence[Paper], domain: str, temperature: float, model: str) -> ReviewOutput:
+    """Generates the review using the selected LLM, caching only the parsed result."""
+    key = (tuple((paper.url, paper.title) for paper in papers), domain, temperature, model)
+    lock, cache = _review_cache()
+    with lock:
+        entry = cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < REVIEW_CACHE_TTL:
+            cache.move_to_end(key)
+            return entry[1]
+    
     # This message will only appear when the cache is "missed".
     st.info("Cache miss: Generating new review with LLM...")
     generator = ReviewGenerator()
-    return generator.generate_with_params(_papers, domain, temperature, model)
+    # Show the raw response while it streams in, then replace it with the formatted review.
+    live_output = st.empty()
+    with live_output.container():
+        response = st.write_stream(generator.stream_with_params(papers, domain, temperature, model))
+    live_output.empty()
+    review = generator.parse_review(response, papers)
+    
+    with lock:
+        cache[key] = (time.monotonic(), review)
+        cache.move_to_end(key)
+        while len(cache) > REVIEW_CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+    return review
 
 # --- Helper function for Markdown export ---
 def format_review_as_markdown(review: ReviewOutput, domain: str) -> str:
@@ -55,6 +90,15 @@ def format_review_as_markdown(review: ReviewOutput, domain: str) -> str:
     
     return md_content
 
+# --- Background warm-up ---
+# Build the shared LLM clients while the user is still filling in the sidebar,
+# so the first "Generate Review" click does not pay for their setup.
+if "clients_warmed_up" not in st.session_state:
+    st.session_state.clients_warmed_up = True
+    warm_up_thread = threading.Thread(target=warm_up_clients, daemon=True)
+    add_script_run_ctx(warm_up_thread)
+    warm_up_thread.start()
+
 # --- Streamlit App UI ---
 
 st.title("Domain Paper Review Generation System")
@@ -77,7 +121,7 @@ with st.sidebar:
     if domain:
         try:
             security_validator._sanitize_text_input(domain, 100)
-            if not re.match(r'^[\w\s\-\.\(\)\+\&\/]+$', domain):
+            if not DOMAIN_PATTERN.match(domain):
                 st.warning("⚠️ Domain contains invalid characters")
             else:
                 st.success("✅ Domain format valid")
@@ -85,7 +129,7 @@ with st.sidebar:
             st.error(f"❌ Domain validation error: {str(e)}")
     
     if years:
-        if not re.match(r'^\d{4}-\d{4}$', years):
+        if not YEARS_PATTERN.match(years):
             st.warning("⚠️ Year format should be YYYY-YYYY")
         else:
             year_start, year_end = map(int, years.split('-'))
@@ -103,21 +147,17 @@ if st.button("Generate Review"):
         
         # Input Validation
         input_data = DomainInput(
-            domain=validated_input['domain'],
-            years=validated_input['years'],
-            paper_count=validated_input['paper_count'],
-            temperature=validated_input['temperature']
+            domain=validated_input.domain,
+            years=validated_input.years,
+            paper_count=validated_input.paper_count,
+            temperature=validated_input.temperature
         )
         
         # Security check passed message
         st.success("✅ Security validation passed")
         
-        # Paper Retrieval (now uses the cached function)
-        papers = get_papers(
-            input_data.domain,
-            input_data.years,
-            input_data.paper_count
-        )
+        # Paper Retrieval (now uses the cached function), reusing the validation above
+        papers = get_papers(validated_input)
         
         # Displaying search results
         st.subheader("Retrieved Key Papers")
@@ -156,8 +196,8 @@ if st.button("Generate Review"):
         
         # Prepare data for download
         markdown_data = format_review_as_markdown(review, input_data.domain)
-        # Note: .dict() is for Pydantic v1. For v2, it's .model_dump()
-        json_data = json.dumps(review.model_dump(), indent=2, ensure_ascii=False)
+        # Serialize straight to JSON in pydantic-core, without an intermediate dict
+        json_data = review.model_dump_json(indent=2)
 
         col1, col2 = st.columns(2)
         with col1:
@@ -1,44 +1,103 @@
 import arxiv
-from typing import List
+import os
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, FrozenSet, List
 from config import Paper, DomainInput
-from sentence_transformers import SentenceTransformer
-import faiss
-import numpy as np
+from arxiv_cache import BulkArxivCache
 import re
-from security import security_validator
+from security import security_validator, ValidatedInput
+
+
+@lru_cache(maxsize=1024)
+def _clean_text(text: str) -> str:
+    """Clean LaTeX and special characters from arXiv text"""
+    text = re.sub(r'\$.+?\$', '', text)  # Remove LaTeX equations
+    text = re.sub(r'\\[a-z]{1,}', '', text)  # Remove LaTeX commands
+    return text.strip()
+
+
+def _shingles(paper: Dict[str, Any]) -> FrozenSet[str]:
+    """Character 4-grams of a paper's title and the start of its abstract"""
+    text = " ".join(f"{paper['title']} {paper['abstract'][:200]}".lower().split())
+    return frozenset(text[i:i + 4] for i in range(len(text) - 3))
 
 
 class PaperRetriever:
     def __init__(self):
-        # Load the model from a local path to avoid network issues.
-        # Make sure you have downloaded the model files and placed them in this directory.
-        local_model_path = 'd:\\yao\\PkU\\Academic2024-2025\\AI basics\\final_project\\academic_review\\local_models\\paraphrase-multilingual-MiniLM-L12-v2'
-        self.embedder = SentenceTransformer(local_model_path)
-        self.index = faiss.IndexFlatL2(384)  # Match embedding dimension
+        # Optional local metadata cache, filled beforehand with arxiv_cache.py
+        cache_path = os.getenv("ARXIV_CACHE_PATH")
+        self.cache = BulkArxivCache(cache_path) if cache_path else None
         
-    def search_papers(self, domain: str, years: str, count: int) -> List[Paper]:
+    def search_papers(self, validated_input: ValidatedInput) -> List[Paper]:
         """Search for papers using the arXiv API"""
-        # Input validation and sanitization
-        validated_input = security_validator.validate_domain_input(
-            domain, years, count, 0.7  # temperature not used here, just for validation
-        )
+        # The caller already ran validate_domain_input; don't validate the same values twice
+        validated_input = security_validator.accept_validated_input(validated_input)
         
-        domain = validated_input['domain']
-        years = validated_input['years']
-        count = validated_input['paper_count']
+        domain = validated_input.domain
+        years = validated_input.years
+        count = validated_input.paper_count
         
         # Parse year range
         year_start, year_end = map(int, years.split('-'))
         
+        # A few extra results are enough to make up for near-duplicates
+        fetch_count = count + 5
+        
+        # Serve the query locally when the cache holds enough papers, otherwise ask arXiv
+        papers = self.cache.search(domain, year_start, year_end, fetch_count) if self.cache else []
+        if len(papers) < count:
+            papers = self._fetch_from_api(domain, year_start, year_end, fetch_count)
+        
+        # Deduplicate: drop papers whose shingles overlap an already kept paper by a Jaccard index above 0.7
+        kept_papers, kept_shingles = [], []
+        for p in papers:
+            shingles = _shingles(p)
+            if all(len(shingles & other) <= 0.7 * len(shingles | other) for other in kept_shingles):
+                kept_papers.append(p)
+                kept_shingles.append(shingles)
+                if len(kept_papers) == count:
+                    break
+        papers = kept_papers
+        
+        processed_papers = []
+        for p in papers:
+            # Apply security sanitization to paper content
+            safe_title = security_validator.sanitize_output(_clean_text(p["title"]))
+            safe_abstract = security_validator.sanitize_output(_clean_text(p["abstract"]))
+            # Sanitize each author on its own: in a joined string the output patterns could
+            # match across names. Repeated names are served from sanitize_output's cache.
+            safe_authors = [security_validator.sanitize_output(author) for author in p["authors"]]
+            
+            # Validate URL for safety
+            safe_url = p["url"] if security_validator.validate_url(p["url"]) else "https://arxiv.org/"
+            
+            # Every field already has its final type, so skip re-validating it
+            paper_obj = Paper.model_construct(
+                title=safe_title,
+                authors=safe_authors,
+                year=p["year"],
+                abstract=safe_abstract,
+                url=safe_url,
+                citations=p["citation_count"]
+            )
+            processed_papers.append(paper_obj)
+            
+        return processed_papers
+    
+    def _fetch_from_api(self, domain: str, year_start: int, year_end: int,
+                        fetch_count: int) -> List[Dict[str, Any]]:
+        """Query the live arXiv API, newest submissions first"""
         # Build arXiv query
         query = f'all:"{domain}"'
         if year_start and year_end:
             query += f" AND submittedDate:[{year_start}01010000 TO {year_end}12312359]"
         
-        client = arxiv.Client()
+        # A single query fits in one page, so the inter-page politeness delay never applies
+        client = arxiv.Client(page_size=fetch_count, delay_seconds=0, num_retries=2)
         search = arxiv.Search(
             query=query,
-            max_results=min(count * 2, 50),  # Retrieve more for filtering
+            max_results=fetch_count,
             sort_by=arxiv.SortCriterion.SubmittedDate,
             sort_order=arxiv.SortOrder.Descending
         )
@@ -46,7 +105,7 @@ class PaperRetriever:
         # Get paper results
         papers = []
         try:
-            for result in client.results(search):
+            for result in islice(client.results(search), fetch_count):
                 papers.append({
                     "title": result.title,
                     "authors": [a.name for a in result.authors],
@@ -58,48 +117,4 @@ class PaperRetriever:
         except arxiv.ArxivError as e:
             raise ValueError(f"arXiv API Error: {str(e)}")
         
-        # Vectorize search results and deduplicate
-        if len(papers) > 1:
-            texts = [f"{p['title']} {p['abstract']}" for p in papers]
-            embeddings = self.embedder.encode(texts, normalize_embeddings=True)
-            self.index.add(embeddings)
-            
-            # Use FAISS for similarity-based deduplication
-            _, indices = self.index.search(embeddings, k=2)
-            unique_indices = set()
-            for i in range(len(indices)):
-                # If the second nearest neighbor is itself (-1) or the first neighbor is not already added
-                if len(indices[i]) < 2 or indices[i][1] == -1 or indices[i][0] not in unique_indices:
-                    unique_indices.add(indices[i][0])
-            
-            # Ensure we don't try to access an index that doesn't exist
-            valid_indices = [i for i in unique_indices if i < len(papers)]
-            papers = [papers[i] for i in sorted(list(valid_indices))][:count]
-        
-        processed_papers = []
-        for p in papers:
-            # Apply security sanitization to paper content
-            safe_title = security_validator.sanitize_output(self._clean_text(p["title"]))
-            safe_abstract = security_validator.sanitize_output(self._clean_text(p["abstract"]))
-            safe_authors = [security_validator.sanitize_output(author) for author in p["authors"]]
-            
-            # Validate URL for safety
-            safe_url = p["url"] if security_validator.validate_url(p["url"]) else "https://arxiv.org/"
-            
-            paper_obj = Paper(
-                title=safe_title,
-                authors=safe_authors,
-                year=p["year"],
-                abstract=safe_abstract,
-                url=safe_url,
-                citations=p["citation_count"]
-            )
-            processed_papers.append(paper_obj)
-            
-        return processed_papers
-    
-    def _clean_text(self, text: str) -> str:
-        """Clean LaTeX and special characters from arXiv text"""
-        text = re.sub(r'\$.+?\$', '', text)  # Remove LaTeX equations
-        text = re.sub(r'\\[a-z]{1,}', '', text)  # Remove LaTeX commands
-        return text.strip()
\ No newline at end of file
+        return papers
@@ -1,89 +1,148 @@
-from openai import OpenAI
-from typing import List
-from config import ReviewOutput, Paper, DomainInput
+from openai import OpenAI, OpenAIError
+from pydantic import ValidationError
+from typing import Iterator, Optional, Sequence
+from config import ReviewOutput, Paper, DomainInput, cache_resource
+import io
 import json
-import time
 import os
 from security import security_validator
 
+# The schema only depends on the model class, so serialize it once at import
+_REVIEW_SCHEMA_JSON = json.dumps(ReviewOutput.model_json_schema(), indent=2)
+
+# The schema is baked into the prompt once; its braces are doubled so str.format leaves them alone
+_PROMPT_TEMPLATE = """Please generate a structured review based on the following papers in the '{safe_domain}' field.
+
+Your entire response MUST be a single, valid JSON object. Do not add any text, comments, or explanations before or after the JSON object.
+
+The JSON object must conform to the following schema:
+""" + _REVIEW_SCHEMA_JSON.replace("{", "{{").replace("}", "}}") + """
+
+Instructions for the content inside the JSON:
+1.  The text for "overview", "trends", "challenges", and "future_directions" should be written in clear, readable Markdown.
+2.  The "key_papers" analysis should be based on the papers provided below.
+3.  Ensure all fields in the schema are present in your JSON output.
+
+Available papers:
+{papers_str}
+
+Now, generate the JSON response:"""
+
+def _extract_json_object(text: str) -> Optional[str]:
+    """Return the first balanced JSON object in text, scanning it only once"""
+    start = text.find('{')
+    if start == -1:
+        return None
+    
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            # Braces inside string literals do not count towards the depth
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+@cache_resource
+def _openai_client() -> OpenAI:
+    """Share one OpenAI client (and its connection pool) across all generators"""
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+@cache_resource
+def _deepseek_client() -> OpenAI:
+    """Share one DeepSeek client (and its connection pool) across all generators"""
+    return OpenAI(api_key=os.getenv("DEEPSEEK_API_KEY"), base_url="https://api.deepseek.com")
+
+def warm_up_clients() -> None:
+    """Create the shared LLM clients ahead of the first review request"""
+    for factory in (_deepseek_client, _openai_client):
+        try:
+            factory()
+        except OpenAIError:
+            # A missing API key is reported when that model is actually used
+            pass
+
 class ReviewGenerator:
-    def __init__(self):
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.deepseek_client = OpenAI(api_key=os.getenv("DEEPSEEK_API_KEY"), base_url="https://api.deepseek.com")
+    def __init__(self, verbose: bool = False):
+        # Echo streamed chunks to the console only when debugging
+        self.verbose = verbose
+        self.openai_client = _openai_client()
+        self.deepseek_client = _deepseek_client()
         
-    def generate_with_params(self, papers: List[Paper], domain: str, 
+    def generate_with_params(self, papers: Sequence[Paper], domain: str, 
                            temperature: float, model: str = "deepseek") -> ReviewOutput:
-        """Generate review with different parameters and security validation"""
-        # Validate inputs
-        validated_input = security_validator.validate_domain_input(domain, "2020-2024", len(papers), temperature)
-        domain = validated_input['domain']
-        temperature = validated_input['temperature']
+        """Generate review with different parameters from already validated input
         
+        No input validation happens here: the domain and temperature are
+        expected to come from security_validator.validate_domain_input, and the
+        papers from PaperRetriever.search_papers, which already sanitizes their
+        content.
+        """
+        buffer = io.StringIO()
+        for content in self.stream_with_params(papers, domain, temperature, model):
+            buffer.write(content)
+        return self.parse_review(buffer.getvalue(), papers)
+    
+    def stream_with_params(self, papers: Sequence[Paper], domain: str,
+                           temperature: float, model: str = "deepseek") -> Iterator[str]:
+        """Yield the raw model response chunk by chunk, as soon as each one arrives"""
         prompt = self._build_prompt(papers, domain)
         
         if model == "deepseek":
-            response = self._stream_deepseek(prompt, temperature)
-        else:
-            response = self._stream_openai(prompt, temperature)
-        
+            return self._stream_deepseek(prompt, temperature)
+        return self._stream_openai(prompt, temperature)
+    
+    def parse_review(self, response: str, papers: Sequence[Paper]) -> ReviewOutput:
+        """Turn the complete raw model response into a ReviewOutput"""
         # Use basic sanitization for output content
         response = security_validator.sanitize_output(response)
             
-        try:
-            # The model might return the JSON wrapped in markdown ```json ... ```
-            # or with some leading/trailing text. We need to extract the JSON object.
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-            if json_start != -1 and json_end > json_start:
-                json_str = response[json_start:json_end]
-                return ReviewOutput(**json.loads(json_str))
-            
-            # If we can't find a JSON object, we'll fall through to the 'except' block
-            raise json.JSONDecodeError("Could not find JSON object in the response", response, 0)
-
-        except json.JSONDecodeError:
-            # Fallback for failed structured output
-            return ReviewOutput(
-                overview=f"Error: The model did not return a valid JSON object. Below is the raw response from the model:\n\n---\n\n{security_validator.sanitize_output(response)}",
-                key_papers=papers[:3],
-                trends="",
-                challenges="",
-                future_directions=""
-            )
+        # The model might return the JSON wrapped in markdown ```json ... ```
+        # or with some leading/trailing text. We need to extract the JSON object.
+        json_str = _extract_json_object(response)
+        if json_str is not None:
+            try:
+                # pydantic-core parses and validates the JSON in a single native pass
+                return ReviewOutput.model_validate_json(json_str)
+            except ValidationError:
+                pass
+        
+        # Fallback for failed structured output
+        return ReviewOutput(
+            overview=f"Error: The model did not return a valid JSON object. Below is the raw response from the model:\n\n---\n\n{response}",
+            key_papers=papers[:3],
+            trends="",
+            challenges="",
+            future_directions=""
+        )
     
-    def _build_prompt(self, papers: List[Paper], domain: str) -> str:
+    def _build_prompt(self, papers: Sequence[Paper], domain: str) -> str:
         papers_str = ""
         for i, p in enumerate(papers):
-            # Sanitize paper data to prevent injection through paper content
-            safe_title = security_validator.sanitize_output(p.title)
-            safe_authors = [security_validator.sanitize_output(author) for author in p.authors]
-            safe_abstract = security_validator.sanitize_output(p.abstract[:200])
-            
-            papers_str += f"{i+1}. {safe_title} ({p.year}) - Citations: {p.citations}\n"
-            papers_str += f"Authors: {', '.join(safe_authors)}\nAbstract: {safe_abstract}..."
+            # Paper content was already sanitized once when it was retrieved
+            papers_str += f"{i+1}. {p.title} ({p.year}) - Citations: {p.citations}\n"
+            papers_str += f"Authors: {', '.join(p.authors)}\nAbstract: {p.abstract[:200]}..."
         
         # Sanitize domain input as well
         safe_domain = security_validator.sanitize_output(domain)
         
-        return f"""Please generate a structured review based on the following papers in the '{safe_domain}' field.
-
-Your entire response MUST be a single, valid JSON object. Do not add any text, comments, or explanations before or after the JSON object.
-
-The JSON object must conform to the following schema:
-{json.dumps(ReviewOutput.model_json_schema(), indent=2)}
-
-Instructions for the content inside the JSON:
-1.  The text for "overview", "trends", "challenges", and "future_directions" should be written in clear, readable Markdown.
-2.  The "key_papers" analysis should be based on the papers provided below.
-3.  Ensure all fields in the schema are present in your JSON output.
-
-Available papers:
-{papers_str}
-
-Now, generate the JSON response:"""
+        return _PROMPT_TEMPLATE.format(safe_domain=safe_domain, papers_str=papers_str)
     
-    def _stream_deepseek(self, prompt: str, temperature: float) -> str:
-        full_response = ""
+    def _stream_deepseek(self, prompt: str, temperature: float) -> Iterator[str]:
         for chunk in self.deepseek_client.chat.completions.create(
             model="deepseek-chat",
             messages=[{"role": "user", "content": prompt}],
@@ -91,14 +150,13 @@ Now, generate the JSON response:"""
             stream=True
         ):
             content = chunk.choices[0].delta.content or ""
-            print(content, end="", flush=True)  # Streaming output
-            full_response += content
-            time.sleep(0.05)
-        print("\n")
-        return full_response
+            if self.verbose:
+                print(content, end="", flush=True)  # Streaming output
+            yield content
+        if self.verbose:
+            print("\n")
     
-    def _stream_openai(self, prompt: str, temperature: float) -> str:
-        full_response = ""
+    def _stream_openai(self, prompt: str, temperature: float) -> Iterator[str]:
         for chunk in self.openai_client.chat.completions.create(
             model="gpt-4",
             messages=[{"role": "user", "content": prompt}],
@@ -106,8 +164,8 @@ Now, generate the JSON response:"""
             stream=True
         ):
             content = chunk.choices[0].delta.content or ""
-            print(content, end="", flush=True)  # Streaming output
-            full_response += content
-            time.sleep(0.05)
-        print("\n")
-        return full_response
\ No newline at end of file
+            if self.verbose:
+                print(content, end="", flush=True)  # Streaming output
+            yield content
+        if self.verbose:
+            print("\n")
@@ -2,72 +2,185 @@
 Test script for security validation functionality
 """
 
-from security import security_validator
+from security import security_validator, _PLAIN_CHARS, _WORD_SCAN
+
+try:
+    import pytest
+except ImportError:
+    # Without pytest the file still runs as a plain script
+    pytest = None
+
+VALID_DOMAIN = "Machine Learning"
+
+# Injection attempts that must all be blocked
+MALICIOUS_INPUTS = [
+    "'; DROP TABLE users; --",
+    "Machine Learning' OR 1=1 --",
+    "ML UNION SELECT * FROM secrets",
+    "exec('rm -rf /')",
+    "<script>alert('xss')</script>",
+    "javascript:alert('hack')",
+    "__import__('os').system('ls')",
+    "eval('malicious code')",
+    "system('cat /etc/passwd')",
+    "ML && curl evil.com",
+    "../../../etc/passwd",
+    "python -c 'import os; os.system(\"whoami\")'",
+]
+
+# Out-of-range parameters that must be rejected, as (domain, years, count, temperature, description)
+EDGE_CASES = [
+    ("", "2020-2024", 5, 0.7, "Empty domain"),
+    ("A" * 200, "2020-2024", 5, 0.7, "Too long domain"),
+    ("Valid Domain", "1500-2030", 5, 0.7, "Invalid year range"),
+    ("Valid Domain", "2020-2024", 100, 0.7, "Too many papers"),
+    ("Valid Domain", "2020-2024", 5, 5.0, "Invalid temperature"),
+]
+
+# Injection keywords written as plain words, which are scanned with the smaller word-only union
+PLAIN_WORD_INPUTS = [
+    "Drop Table papers",
+    "ML union select secrets",
+    "Deep Learning with bash",
+    "sudo learning",
+    "Transformers for shutdown prediction",
+]
+
+# Output text and what sanitize_output must turn it into
+SANITIZE_CASES = [
+    ("Attention Is All You Need", "Attention Is All You Need"),
+    ("a < b and c > d", "a &lt; b and c &gt; d"),
+    ("Tom & Jerry", "Tom &amp; Jerry"),
+    ("see javascript:alert(1) now", "see  now"),
+    ('<div onload="evil()">x</div>', "&lt;div &gt;x&lt;/div&gt;"),
+    ("x onclick = 'y' z", "x  z"),
+]
+
+# Paper links validate_url must accept by default, i.e. in strict arXiv-only mode
+ARXIV_URLS = [
+    "http://arxiv.org/abs/2401.01234v1",
+    "https://arxiv.org/abs/2401.01234v2",
+    "https://arxiv.org/pdf/2401.01234",
+    "http://arxiv.org/abs/hep-th/9901001v1",
+    "https://export.arxiv.org/abs/hep-th/9901001",
+]
+
+# Links validate_url must reject, as (url, strict)
+REJECTED_URLS = [
+    ("https://arxiv.org.evil.com/abs/1", True),
+    ("https://evil.com/arxiv.org/abs/1", True),
+    ("https://arxiv.org/abs/1\n", True),
+    ("javascript:alert(1)", True),
+    ("https://example.com/paper", True),
+    ("http://localhost:8501/abs/1", False),
+    ("http://192.168.0.1/abs/1", False),
+    ("file:///etc/passwd", False),
+]
+
+# Every case as (validate_domain_input arguments, expected to be accepted, label)
+CASES = (
+    [((VALID_DOMAIN, "2020-2024", 5, 0.7), True, "Valid input")]
+    + [((m, "2020-2024", 5, 0.7), False, f"Malicious input {i}: {m[:30]}")
+       for i, m in enumerate(MALICIOUS_INPUTS, 1)]
+    + [((domain, years, count, temp), False, description)
+       for domain, years, count, temp, description in EDGE_CASES]
+)
+
+# The same domains as parallel arrays, for one validate_many call
+BATCH_DOMAINS = [VALID_DOMAIN] + MALICIOUS_INPUTS
+BATCH_EXPECTED = [True] + [False] * len(MALICIOUS_INPUTS)
 
 def test_security_validation():
     """Test various injection attempts to ensure they are blocked"""
     
-    print("Testing Security Validation...")
+    # Rejections are expected here, so use the variant that reports them without raising
+    is_valid = security_validator.is_valid_domain_input
     
-    # Test valid inputs
-    try:
-        result = security_validator.validate_domain_input(
-            "Machine Learning", "2020-2024", 5, 0.7
-        )
-        print("✅ Valid input accepted:", result['domain'])
-    except ValueError as e:
-        print("❌ Valid input rejected:", str(e))
+    # Only record outcomes while validating; the report is formatted once at the end
+    results = []
+    for args, expect_ok, label in CASES:
+        ok, reason = is_valid(*args)
+        results.append((label, expect_ok, ok, reason))
     
-    # Test SQL injection attempts
-    malicious_inputs = [
-        "'; DROP TABLE users; --",
-        "Machine Learning' OR 1=1 --",
-        "ML UNION SELECT * FROM secrets",
-        "exec('rm -rf /')",
-        "<script>alert('xss')</script>",
-        "javascript:alert('hack')",
-        "__import__('os').system('ls')",
-        "eval('malicious code')",
-        "system('cat /etc/passwd')",
-        "ML && curl evil.com",
-        "../../../etc/passwd",
-        "python -c 'import os; os.system(\"whoami\")'",
-    ]
+    # The batch check must agree with the per-input one
+    batch = security_validator.validate_many(BATCH_DOMAINS, "2020-2024", 5, 0.7)
     
-    print("\nTesting malicious inputs:")
-    for i, malicious_input in enumerate(malicious_inputs, 1):
-        try:
-            security_validator.validate_domain_input(
-                malicious_input, "2020-2024", 5, 0.7
-            )
-            print(f"❌ Test {i}: Malicious input was NOT blocked: {malicious_input[:30]}...")
-        except ValueError as e:
-            print(f"✅ Test {i}: Malicious input blocked successfully")
+    report = ["Testing Security Validation..."]
+    failures = []
+    for label, expect_ok, ok, reason in results:
+        if ok == expect_ok:
+            report.append(f"✅ {label}: {'accepted' if ok else 'blocked'} as expected")
+        else:
+            report.append(f"❌ {label}: was {'NOT blocked' if ok else f'rejected ({reason})'}")
+            failures.append(label)
     
-    # Test edge cases
-    edge_cases = [
-        ("", "Empty domain"),
-        ("A" * 200, "Too long domain"),
-        ("Valid Domain", "1500-2030", 5, 0.7, "Invalid year range"),
-        ("Valid Domain", "2020-2024", 100, 0.7, "Too many papers"),
-        ("Valid Domain", "2020-2024", 5, 5.0, "Invalid temperature"),
-    ]
+    if batch == BATCH_EXPECTED:
+        report.append("✅ Batch validation accepted the valid input and blocked every malicious one")
+    else:
+        wrong = [d for d, got, expected in zip(BATCH_DOMAINS, batch, BATCH_EXPECTED) if got != expected]
+        report.append(f"❌ Batch validation got {len(wrong)} input(s) wrong: {wrong}")
+        failures.append("Batch validation")
     
-    print("\nTesting edge cases:")
-    for i, case in enumerate(edge_cases, 1):
+    print("\n".join(report))
+    assert not failures, failures
+    print("\n✅ Security validation tests completed!")
+
+def test_accept_validated_input():
+    """Validated input is handed back as is, and nothing else gets through"""
+    validated = security_validator.validate_domain_input(*CASES[0][0])
+    assert security_validator.accept_validated_input(validated) is validated
+    
+    # The raw values the retriever used to re-validate are refused instead
+    for unvalidated in (CASES[0][0], MALICIOUS_INPUTS[0], {"domain": VALID_DOMAIN}):
         try:
-            if len(case) == 5:
-                domain, years, count, temp, description = case
-                security_validator.validate_domain_input(domain, years, count, temp)
-                print(f"❌ Test {i}: {description} was NOT caught")
-            else:
-                domain, description = case
-                security_validator.validate_domain_input(domain, "2020-2024", 5, 0.7)
-                print(f"❌ Test {i}: {description} was NOT caught")
-        except ValueError as e:
-            print(f"✅ Test {i}: {case[-1] if len(case) > 2 else case[1]} caught successfully")
+            security_validator.accept_validated_input(unvalidated)
+            assert False, f"Unvalidated input was passed through: {unvalidated!r}"
+        except ValueError:
+            pass
+    print("✅ Only validated input is passed through without re-validation")
+
+def test_plain_word_keywords():
+    """Keywords in input without any punctuation are still caught by the word-only scan"""
+    for plain_input in PLAIN_WORD_INPUTS:
+        assert not plain_input.translate(_PLAIN_CHARS), f"{plain_input!r} is not plain text"
+        assert _WORD_SCAN.search(plain_input.lower()), f"Word scan missed {plain_input!r}"
+        ok, _ = security_validator.is_valid_domain_input(plain_input, "2020-2024", 5, 0.7)
+        assert not ok, f"Plain-word input was NOT blocked: {plain_input!r}"
+    print("✅ Plain-word keywords blocked by the word-only scan")
+
+def test_sanitize_output():
+    """Clean text is returned untouched and markup, entities and handlers are neutralised"""
+    for text, expected in SANITIZE_CASES:
+        sanitized = security_validator.sanitize_output(text)
+        assert sanitized == expected, f"{text!r} sanitized to {sanitized!r}, expected {expected!r}"
+    print("✅ Output sanitization handles clean text, '<', '&', 'javascript:' and event handlers")
+
+def test_validate_url():
+    """Only arXiv paper links pass by default; strict=False still blocks private hosts"""
+    for url in ARXIV_URLS:
+        assert security_validator.validate_url(url), f"arXiv link rejected: {url!r}"
+    for url, strict in REJECTED_URLS:
+        assert not security_validator.validate_url(url, strict=strict), f"Unsafe link accepted: {url!r}"
+    assert security_validator.validate_url("https://example.com/paper", strict=False)
+    print("✅ URL validation accepts arXiv links and rejects look-alikes and private hosts")
+
+if pytest is not None:
+    # One call per case and no printing, so pytest (and pytest-benchmark) only see the validator
+    @pytest.mark.parametrize("malicious_input", MALICIOUS_INPUTS)
+    def test_malicious_input_blocked(malicious_input):
+        """Every injection attempt must be rejected"""
+        with pytest.raises(ValueError):
+            security_validator.validate_domain_input(malicious_input, "2020-2024", 5, 0.7)
     
-    print("\n✅ Security validation tests completed!")
+    @pytest.mark.parametrize("case", EDGE_CASES, ids=[case[-1] for case in EDGE_CASES])
+    def test_edge_case_rejected(case):
+        """Every out-of-range parameter must be rejected"""
+        with pytest.raises(ValueError):
+            security_validator.validate_domain_input(*case[:-1])
 
 if __name__ == "__main__":
     test_security_validation()
+    test_accept_validated_input()
+    test_plain_word_keywords()
+    test_sanitize_output()
+    test_validate_url()